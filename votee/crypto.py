@@ -1,50 +1,91 @@
+import array
 import base64
-import re
 import struct
-from typing import Optional
+import sys
+from functools import lru_cache
+from typing import Iterator, List, Optional
 
 import Crypto.Random
 from Crypto.Cipher import AES
 
+_ZERO12 = bytes(12)
+URLSAFE_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
 
 def rand128() -> bytes:
     return Crypto.Random.get_random_bytes(16)
 
 
+@lru_cache(maxsize=256)
+def _ecb(secret: bytes):
+    assert len(secret) == 16, len(secret)
+    return AES.new(secret, AES.MODE_ECB)
+
+
 def urlencode(key: bytes) -> str:
     assert isinstance(key, bytes)
     assert len(key) == 16
-    encoded = base64.urlsafe_b64encode(key).decode()
-    assert encoded.endswith("==")
-    stripped = encoded.rpartition("==")[0]
-    assert re.match(r"^[a-zA-Z0-9_-]{22}$", stripped), stripped
-    return stripped
+    return base64.urlsafe_b64encode(key)[:-2].decode("ascii")
+
+
+def urlencode_many(buf: bytes) -> Iterator[str]:
+    assert len(buf) % 16 == 0, len(buf)
+    n = len(buf) // 16
+    # Pad each 16-byte block to 18 bytes so that every block encodes to its
+    # own 24 characters; the first 22 of those are exactly urlencode(block).
+    padded = bytearray(18 * n)
+    for k in range(16):
+        padded[k::18] = buf[k::16]
+    encoded = base64.urlsafe_b64encode(padded).decode("ascii")
+    for j in range(n):
+        yield encoded[24 * j : 24 * j + 22]
 
 
 def urldecode(key: str) -> Optional[bytes]:
-    if len(key) != 22:
+    if len(key) != 22 or not key.isascii():
         return None
-    if not re.match(r"^[a-zA-Z0-9_-]{22}$", key):
+    b = key.encode("ascii")
+    # Deleting every allowed character leaves nothing iff the key is valid.
+    if b.translate(None, URLSAFE_ALPHABET):
         return None
-    return base64.urlsafe_b64decode(key.encode("ascii", errors="replace") + b"==")
+    return base64.urlsafe_b64decode(b + b"==")
 
 
 def encrypt_int(secret: bytes, plaintext: int) -> bytes:
-    assert len(secret) == 16
-    cipher = AES.new(secret, AES.MODE_ECB)
+    cipher = _ecb(bytes(secret))
     b = struct.pack("<IIII", plaintext, 0, 0, 0)
     assert len(b) == 16
     return cipher.encrypt(b)
 
 
+def encrypt_ints(secret: bytes, lo: int, hi: int) -> bytes:
+    cipher = _ecb(bytes(secret))
+    # Fill the counter word of every block with one strided slice assignment.
+    words = array.array("I", bytes(16 * (hi - lo)))
+    assert words.itemsize == 4
+    words[0::4] = array.array("I", range(lo, hi))
+    if sys.byteorder == "big":
+        words.byteswap()
+    return cipher.encrypt(words.tobytes())
+
+
 def decrypt_int(secret: bytes, ct: bytes, valid_values: int) -> Optional[int]:
     if len(ct) != 16:
         return None
-    assert len(secret) == 16, len(secret)
-    cipher = AES.new(secret, AES.MODE_ECB)
+    cipher = _ecb(bytes(secret))
     pt = cipher.decrypt(ct)
     assert len(pt) == 16
-    a, b, c, d = struct.unpack("<IIII", pt)
-    if a >= valid_values or not b == c == d == 0:
+    (a,) = struct.unpack_from("<I", pt)
+    if a >= valid_values or pt[4:] != _ZERO12:
         return None
     return a
+
+
+def decrypt_ints(secret: bytes, buf: bytes, valid_values: int) -> List[Optional[int]]:
+    assert len(buf) % 16 == 0, len(buf)
+    cipher = _ecb(bytes(secret))
+    pt = cipher.decrypt(buf)
+    return [
+        a if a < valid_values and b == c == d == 0 else None
+        for a, b, c, d in struct.iter_unpack("<IIII", pt)
+    ]
@@ -0,0 +1,63 @@
+import json
+
+import votee.models
+from django.db import migrations, models
+
+
+def settings_from_raw(apps, schema_editor):
+    defaults = {
+        "Election": votee.models.default_election_settings,
+        "Poll": votee.models.default_poll_settings,
+    }
+    for model_name, default in defaults.items():
+        for obj in apps.get_model("votee", model_name).objects.all():
+            obj.settings = {**default(), **json.loads(obj.settings_raw or "{}")}
+            obj.save(update_fields=["settings"])
+
+
+def settings_to_raw(apps, schema_editor):
+    for model_name in ("Election", "Poll"):
+        for obj in apps.get_model("votee", model_name).objects.all():
+            obj.settings_raw = json.dumps(obj.settings)
+            obj.save(update_fields=["settings_raw"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("votee", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="election",
+            name="settings",
+            field=models.JSONField(default=votee.models.default_election_settings),
+        ),
+        migrations.AddField(
+            model_name="poll",
+            name="settings",
+            field=models.JSONField(default=votee.models.default_poll_settings),
+        ),
+        migrations.RunPython(settings_from_raw, settings_to_raw),
+        # Give settings_raw a default so that reversing the RemoveField below
+        # can re-add the NOT NULL column to tables that already have rows.
+        migrations.AlterField(
+            model_name="election",
+            name="settings_raw",
+            field=models.TextField(default=""),
+        ),
+        migrations.AlterField(
+            model_name="poll",
+            name="settings_raw",
+            field=models.TextField(default=""),
+        ),
+        migrations.RemoveField(
+            model_name="election",
+            name="settings_raw",
+        ),
+        migrations.RemoveField(
+            model_name="poll",
+            name="settings_raw",
+        ),
+    ]
@@ -1,5 +1,7 @@
-import json
-from typing import List, Optional, TypedDict
+import hmac
+from collections import Counter, defaultdict
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, TypedDict
 
 import votee.crypto
 from django.core.validators import validate_unicode_slug
@@ -13,20 +15,34 @@ class ElectionSettings(TypedDict):
 
 
 class PollSettings(TypedDict):
-    option_order: List[str]
+    option_order: List[int]
     votes_per_ballot: int
     accepting_votes: bool
     voting_start: float
     voting_interval: float
 
 
+def default_election_settings() -> ElectionSettings:
+    return {"poll_order": []}
+
+
+def default_poll_settings() -> PollSettings:
+    return {
+        "option_order": [],
+        "votes_per_ballot": 1,
+        "accepting_votes": False,
+        "voting_start": 0,
+        "voting_interval": 0,
+    }
+
+
 class Election(models.Model):
     name = models.TextField()
     slug = models.SlugField(
         max_length=50, unique=True, validators=[validate_unicode_slug]
     )
     admin_secret = models.BinaryField(max_length=16, default=votee.crypto.rand128)
-    settings_raw = models.TextField()
+    settings = models.JSONField(default=default_election_settings)
 
     def __str__(self) -> str:
         return self.name
@@ -36,9 +52,9 @@ class Election(models.Model):
             "election_detail", {"election": self.election.slug, "poll": self.slug}
         )
 
-    @property
-    def settings(self) -> ElectionSettings:
-        return {"poll_order": [], **json.loads(self.settings_raw or "{}")}
+    def _write_settings(self, key: str, v: object) -> None:
+        self.settings[key] = v
+        self.__dict__.pop("_order_index", None)
 
     @property
     def poll_order(self) -> List[str]:
@@ -46,23 +62,37 @@ class Election(models.Model):
 
     @poll_order.setter
     def poll_order(self, v: List[str]) -> None:
-        self.settings_raw = json.dumps({**self.settings, "poll_order": v})
+        self._write_settings("poll_order", v)
+
+    @cached_property
+    def _order_index(self) -> Dict[str, int]:
+        return {s: i for i, s in enumerate(self.poll_order)}
 
     def polls(self) -> List["Poll"]:
-        poll_order = {s: i for i, s in enumerate(self.poll_order)}
+        poll_order = self._order_index
         all_polls = list(Poll.objects.filter(election=self))
-        all_polls.sort(key=lambda p: (p.slug not in poll_order, poll_order.get(p.slug)))
+        for p in all_polls:
+            # Reuse this instance (and its cached admin key) in the polls.
+            p.election = self
+        all_polls.sort(key=lambda p: poll_order.get(p.slug, float("inf")))
         return all_polls
 
+    @cached_property
+    def _admin_key_ciphertext(self) -> bytes:
+        return votee.crypto.encrypt_int(self.admin_secret, 0)
+
+    @cached_property
+    def _admin_key(self) -> str:
+        return votee.crypto.urlencode(self._admin_key_ciphertext)
+
     def get_admin_key(self) -> str:
-        return votee.crypto.urlencode(votee.crypto.encrypt_int(self.admin_secret, 0))
+        return self._admin_key
 
     def validate_admin_key(self, k: str) -> bool:
         assert isinstance(k, str)
         decoded = votee.crypto.urldecode(k)
-        return (
-            decoded is not None
-            and votee.crypto.decrypt_int(self.admin_secret, decoded, 1) == 0
+        return decoded is not None and hmac.compare_digest(
+            decoded, self._admin_key_ciphertext
         )
 
 
@@ -70,7 +100,7 @@ class Poll(models.Model):
     election = models.ForeignKey(Election, models.CASCADE)
     name = models.TextField()
     slug = models.SlugField(max_length=50, validators=[validate_unicode_slug])
-    settings_raw = models.TextField()
+    settings = models.JSONField(default=default_poll_settings)
     ballot_secret = models.BinaryField(max_length=16, default=votee.crypto.rand128)
     number_of_ballots = models.IntegerField(default=0)
 
@@ -91,70 +121,70 @@ class Poll(models.Model):
             + self.election.get_admin_key()
         )
 
-    @property
-    def settings(self) -> PollSettings:
-        return {
-            "option_order": [],
-            "votes_per_ballot": 1,
-            "accepting_votes": False,
-            "voting_start": 0,
-            "voting_interval": 0,
-            **json.loads(self.settings_raw or "{}"),
-        }
+    def _write_settings(self, key: str, v: object) -> None:
+        self.settings[key] = v
+        self.__dict__.pop("_order_index", None)
+
+    def get_settings(self) -> PollSettings:
+        # The stored dict may lack keys, e.g. when edited in the Django admin.
+        return {**default_poll_settings(), **self.settings}  # type: ignore
 
     @property
     def votes_per_ballot(self) -> int:
-        return self.settings["votes_per_ballot"]
+        return self.get_settings()["votes_per_ballot"]
 
     @votes_per_ballot.setter
     def votes_per_ballot(self, v: int) -> None:
-        self.settings_raw = json.dumps({**self.settings, "votes_per_ballot": v})
+        self._write_settings("votes_per_ballot", v)
 
     @property
     def accepting_votes(self) -> bool:
-        return self.settings["accepting_votes"]
+        return self.get_settings()["accepting_votes"]
 
     @accepting_votes.setter
     def accepting_votes(self, v: bool) -> None:
-        self.settings_raw = json.dumps({**self.settings, "accepting_votes": v})
+        self._write_settings("accepting_votes", v)
 
     @property
-    def option_order(self) -> List[str]:
+    def option_order(self) -> List[int]:
         return list(self.settings.get("option_order", ()))
 
     @option_order.setter
-    def option_order(self, v: List[str]) -> None:
-        self.settings_raw = json.dumps({**self.settings, "option_order": v})
+    def option_order(self, v: List[int]) -> None:
+        self._write_settings("option_order", v)
 
     @property
     def voting_start(self) -> float:
-        return list(self.settings.get("voting_start", ()))
+        return self.get_settings()["voting_start"]
 
     @voting_start.setter
     def voting_start(self, v: float) -> None:
-        self.settings_raw = json.dumps({**self.settings, "voting_start": v})
+        self._write_settings("voting_start", v)
 
     @property
     def voting_interval(self) -> float:
-        return list(self.settings.get("voting_interval", ()))
+        return self.get_settings()["voting_interval"]
 
     @voting_interval.setter
     def voting_interval(self, v: float) -> None:
-        self.settings_raw = json.dumps({**self.settings, "voting_interval": v})
+        self._write_settings("voting_interval", v)
 
     def options(self) -> List["PollOption"]:
-        option_order = {s: i for i, s in enumerate(self.option_order)}
-        all_options = list(PollOption.objects.filter(poll=self))
-        all_options.sort(
-            key=lambda p: (p.id not in option_order, option_order.get(p.id))
-        )
+        return self.sort_options(PollOption.objects.filter(poll=self))
+
+    @cached_property
+    def _order_index(self) -> Dict[int, int]:
+        return {s: i for i, s in enumerate(self.option_order)}
+
+    def sort_options(self, options: Iterable["PollOption"]) -> List["PollOption"]:
+        option_order = self._order_index
+        all_options = list(options)
+        all_options.sort(key=lambda p: option_order.get(p.id, float("inf")))
         return all_options
 
-    def get_ballots(self, lo: int, hi: int) -> List[str]:
-        return [
-            votee.crypto.urlencode(votee.crypto.encrypt_int(self.ballot_secret, i))
-            for i in range(lo, hi)
-        ]
+    def get_ballots(self, lo: int, hi: int) -> Iterator[str]:
+        ct = votee.crypto.encrypt_ints(self.ballot_secret, lo, hi)
+        return votee.crypto.urlencode_many(ct)
 
     def validate_ballot(self, k: str) -> Optional[int]:
         decoded = votee.crypto.urldecode(k)
@@ -164,6 +194,16 @@ class Poll(models.Model):
             self.ballot_secret, decoded, self.number_of_ballots
         )
 
+    def validate_ballots(self, keys: List[str]) -> List[Optional[int]]:
+        decoded = [votee.crypto.urldecode(k) for k in keys]
+        valid = [d for d in decoded if d is not None]
+        results = iter(
+            votee.crypto.decrypt_ints(
+                self.ballot_secret, b"".join(valid), self.number_of_ballots
+            )
+        )
+        return [None if d is None else next(results) for d in decoded]
+
     class Meta:
         unique_together = [
             ("election", "slug"),
@@ -195,11 +235,15 @@ class UsedBallot(models.Model):
 
 
 def use_ballot(p: Poll, i: int, options: List[PollOption]) -> bool:
-    if UsedBallot.objects.filter(poll=p, ballot_index=i).exists():
-        return False
-    qs = PollOption.objects.filter(id__in=[o.id for o in options])
+    # The same option may be chosen several times (e.g. blank votes),
+    # so group the options by how many votes they receive.
+    ids_by_votes: Dict[int, List[int]] = defaultdict(list)
+    for option_id, votes in Counter(o.id for o in options).items():
+        ids_by_votes[votes].append(option_id)
     with transaction.atomic():
-        UsedBallot.objects.create(poll=p, ballot_index=i)
-        for o in options:
-            PollOption.objects.filter(id=o.id).update(count=F("count") + 1)
+        _, created = UsedBallot.objects.get_or_create(poll=p, ballot_index=i)
+        if not created:
+            return False
+        for votes, ids in ids_by_votes.items():
+            PollOption.objects.filter(id__in=ids).update(count=F("count") + votes)
     return True
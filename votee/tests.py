@@ -1,4 +1,6 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
 from votee import crypto, models
 
 
@@ -12,6 +14,8 @@ class VoteeTests(TestCase):
         assert e.validate_admin_key(admin_key)
         assert not e.validate_admin_key("abc")
         assert not e.validate_admin_key("0123456789012345678912")
+        assert crypto.urldecode("æ" * 22) is None
+        assert crypto.urldecode("+" * 22) is None
         assert (
             crypto.urldecode(crypto.urlencode(b"0123456789abcdef"))
             == b"0123456789abcdef"
@@ -27,6 +31,8 @@ class VoteeTests(TestCase):
             b1,
             b2,
         ) = poll.get_ballots(0, 3)
+        assert list(poll.get_ballots(1, 3)) == [b1, b2]
+        assert b0 == crypto.urlencode(crypto.encrypt_int(poll.ballot_secret, 0))
         r0 = poll.validate_ballot(b0)
         assert r0 is None, r0
         assert poll.validate_ballot(b1) is None
@@ -37,6 +43,7 @@ class VoteeTests(TestCase):
         assert poll.validate_ballot(b0) == 0
         assert poll.validate_ballot(b1) == 1
         assert poll.validate_ballot(b2) is None
+        assert poll.validate_ballots([b2, "abc", b1, b0]) == [None, None, 1, 0]
 
         blank = models.PollOption.objects.create(
             poll=poll,
@@ -60,3 +67,35 @@ class VoteeTests(TestCase):
         assert models.PollOption.objects.get(id=opt2.id).count == 1
         assert models.use_ballot(poll, 2, [blank, blank])
         assert models.PollOption.objects.get(id=blank.id).count == 2
+
+    def test_partial_settings(self) -> None:
+        e = models.Election.objects.create(name="Test", slug="test", settings={})
+        poll = models.Poll.objects.create(
+            election=e,
+            name="Test poll",
+            slug="test-poll",
+            settings={"accepting_votes": True},
+        )
+        poll = models.Poll.objects.get(id=poll.id)
+        assert poll.accepting_votes
+        assert poll.votes_per_ballot == 1
+        assert poll.voting_start == 0
+        assert poll.voting_interval == 0
+        assert poll.option_order == []
+        assert e.polls() == [poll]
+
+    def test_create_election(self) -> None:
+        user = User.objects.create_superuser("admin", password="admin")
+        self.client.force_login(user)
+        polls = "Food\n  Potatoes\n  Carrots\n  (blank)\nDrink\n  Water\n"
+        response = self.client.post(
+            reverse("election_create"), {"name": "Test", "polls": polls}
+        )
+        assert response.status_code == 302, response.status_code
+        e = models.Election.objects.get(slug="test")
+        assert response["Location"].endswith("?a=" + e.get_admin_key())
+        food, drink = models.Poll.objects.filter(election=e).order_by("id")
+        assert (food.slug, drink.slug) == ("food", "drink")
+        assert models.PollOption.objects.count() == 4
+        assert sorted(o.name for o in food.options()) == ["", "Carrots", "Potatoes"]
+        assert [o.name for o in drink.options()] == ["Water"]
@@ -1,6 +1,7 @@
 import datetime
 import json
 import time
+from collections import defaultdict
 
 from django import forms
 from django.db import IntegrityError, transaction
@@ -24,7 +25,7 @@ class SingleElectionMixin:
 class SinglePollMixin(SingleElectionMixin):
     def get_poll(self) -> models.Poll:
         try:
-            return models.Poll.objects.get(
+            return models.Poll.objects.select_related("election").get(
                 election__slug=self.kwargs["election"], slug=self.kwargs["poll"]
             )
         except models.Poll.DoesNotExist:
@@ -93,10 +94,18 @@ class ElectionCreate(FormView):
                 )
                 for p in polls:
                     p.election = e
-                    p.save()
+                models.Poll.objects.bulk_create(polls)
+                if any(p.pk is None for p in polls):
+                    # Not every database backend returns ids from bulk_create.
+                    poll_ids = dict(
+                        models.Poll.objects.filter(election=e).values_list("slug", "id")
+                    )
+                    for p in polls:
+                        p.pk = poll_ids[p.slug]
                 for o in options:
+                    # Reassign to copy the now known poll id into o.poll_id.
                     o.poll = o.poll
-                    o.save()
+                models.PollOption.objects.bulk_create(options)
         except IntegrityError as err:
             form.add_error(None, err.args[0])
             return self.form_invalid(form)
@@ -175,11 +184,17 @@ class ElectionAdmin(FormView, SingleElectionMixin):
         context_data["rows"] = [
             [form[k] for k in keys] + [p.get_admin_url()] for p, *keys in self.rows
         ]
+        options_by_poll = defaultdict(list)
+        for o in models.PollOption.objects.filter(poll__in=self.polls).order_by("id"):
+            options_by_poll[o.poll_id].append(o)
         poll_export = "\n\n".join(
             "%s\n\n%s"
             % (
                 poll.name,
-                "\n".join("    %s" % (o.name or "(blank)") for o in poll.options()),
+                "\n".join(
+                    "    %s" % (o.name or "(blank)")
+                    for o in poll.sort_options(options_by_poll[poll.id])
+                ),
             )
             for poll in self.polls
         )
@@ -278,7 +293,7 @@ class PollDetail(FormView, SinglePollMixin):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
-        s = self.poll.settings
+        s = self.poll.get_settings()
         voting_interval = s["voting_interval"]
         if voting_interval:
             next_vote = s["voting_start"] - time.time()
@@ -330,7 +345,7 @@ class PollDetail(FormView, SinglePollMixin):
         url = (
             reverse(
                 "poll_detail",
-                kwargs={"election": self.get_election().slug, "poll": self.poll.slug},
+                kwargs={"election": self.poll.election.slug, "poll": self.poll.slug},
             )
             + "?voted=1"
         )
@@ -361,7 +376,7 @@ class PollAdmin(FormView, SinglePollMixin):
 
     def get_form(self) -> forms.Form:
         f = forms.Form(**self.get_form_kwargs())
-        s = self.poll.settings
+        s = self.poll.get_settings()
         ac = s["accepting_votes"]
         if s["voting_start"]:
             self.voting_start = timezone.make_aware(
@@ -379,7 +394,10 @@ class PollAdmin(FormView, SinglePollMixin):
             self.first_vote = ""
         voting_interval = s["voting_interval"]
         self.options = self.poll.options()
-        any_votes = any(bool(o.count) for o in self.options)
+        # The options are needed for the form anyway, so sum their counts here
+        # rather than issuing a separate aggregate query.
+        self.vote_count = sum(o.count for o in self.options)
+        any_votes = self.vote_count > 0
         f.fields["name"] = forms.CharField(
             initial=self.poll.name,
         )
@@ -449,22 +467,25 @@ class PollAdmin(FormView, SinglePollMixin):
             + "?a="
             + admin_key
         )
-        ballot_url = reverse("poll_detail", kwargs=reverse_args) + "?s="
-        ballots = [
-            ballot_url + b
-            for b in self.poll.get_ballots(0, self.poll.number_of_ballots)
-        ]
+        show_results = bool(self.request.GET.get("results"))
+        ballots = []
+        if not show_results:
+            # Ballot keys are not listed on the results page.
+            ballot_url = reverse("poll_detail", kwargs=reverse_args) + "?s="
+            ballots = [
+                ballot_url + b
+                for b in self.poll.get_ballots(0, self.poll.number_of_ballots)
+            ]
         used_ballots = models.UsedBallot.objects.filter(poll=self.poll).count()
-        vote_count = sum(o.count for o in self.options)
         context_data.update(
             poll=self.poll,
             election_url=election_url,
             rows=rows,
             options=self.options,
-            vote_count=vote_count,
+            vote_count=self.vote_count,
             used_ballots=used_ballots,
             ballots=ballots,
-            show_results=bool(self.request.GET.get("results")),
+            show_results=show_results,
             show_results_link=url,
             voting_start=self.voting_start,
             first_vote=self.first_vote,